@@ -1,3 +1,3 @@
 #!/bin/bash -e
 
-pytest sql_to_ibis/tests
\ No newline at end of file
+pytest -n auto sql_to_ibis/tests
\ No newline at end of file
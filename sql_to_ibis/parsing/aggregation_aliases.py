@@ -1,9 +1,22 @@
-from typing import Set
+from typing import Dict, FrozenSet
 
-AVG_AGGREGATIONS: Set[str] = {"avg", "mean"}
-SUM_AGGREGATIONS: Set[str] = {"sum"}
-NUMERIC_AGGREGATIONS: Set[str] = AVG_AGGREGATIONS.copy()
-NUMERIC_AGGREGATIONS.update(SUM_AGGREGATIONS)
-MIN_AGGREGATIONS: Set[str] = {"min", "minimum"}
-MAX_AGGREGATIONS: Set[str] = {"max", "maximum"}
-COUNT_AGGREGATIONS = {"count"}
+AVG_AGGREGATIONS: FrozenSet[str] = frozenset({"avg", "mean"})
+SUM_AGGREGATIONS: FrozenSet[str] = frozenset({"sum"})
+MIN_AGGREGATIONS: FrozenSet[str] = frozenset({"min", "minimum"})
+MAX_AGGREGATIONS: FrozenSet[str] = frozenset({"max", "maximum"})
+COUNT_AGGREGATIONS: FrozenSet[str] = frozenset({"count"})
+
+# Maps each aggregation alias to the ibis column method that implements it. Columns
+# that don't support an aggregation (for example strings with avg) simply don't
+# define the method
+AGGREGATION_METHODS: Dict[str, str] = {
+    alias: method
+    for aliases, method in (
+        (AVG_AGGREGATIONS, "mean"),
+        (SUM_AGGREGATIONS, "sum"),
+        (MAX_AGGREGATIONS, "max"),
+        (MIN_AGGREGATIONS, "min"),
+        (COUNT_AGGREGATIONS, "count"),
+    )
+    for alias in aliases
+}
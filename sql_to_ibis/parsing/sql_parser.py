@@ -1,6 +1,7 @@
 """
 Module containing all lark internal_transformer classes
 """
+from datetime import datetime
 import re
 from typing import Any, Dict, List, Set, Tuple, Union
 
@@ -30,7 +31,6 @@ from sql_to_ibis.sql.sql_value_objects import (
     GroupByColumn,
     Join,
     JoinBase,
-    Literal,
     Subquery,
     Table,
     Value,
@@ -98,9 +98,9 @@ class SQLTransformer(TransformerBaseClass):
             table_map,
             column_name_map,
             column_to_table_name,
-            _temp_dataframes_dict={},
         )
         self._alias_registry = AliasRegistry()
+        self._now = datetime.now()
 
     def add_column_to_column_to_table_name_map(self, column, table):
         """
@@ -193,6 +193,7 @@ class SQLTransformer(TransformerBaseClass):
                 self._column_to_table_name,
                 self._table_name_map,
                 self._alias_registry,
+                self._now,
             ),
         )
         info.add_table(join)
@@ -315,63 +316,63 @@ class SQLTransformer(TransformerBaseClass):
                 return True
         return False
 
+    @staticmethod
+    def _get_from_item_tables(table_object) -> List[Table]:
+        """
+        Returns the tables referenced by a single item in a from clause
+        :param table_object: Table, subquery, join or cross join tree
+        :return:
+        """
+        if isinstance(table_object, JoinBase):
+            return [table_object.right_table, table_object.left_table]
+        if (
+            isinstance(table_object, Tree)
+            and table_object.data == "cross_join_expression"
+        ):
+            cross_join: CrossJoin = table_object.children[0]
+            return [cross_join.right_table, cross_join.left_table]
+        return [table_object]
+
     def select(self, *select_expressions: Tuple[Tree]) -> QueryInfo:
         """
         Forms the final sequence of methods that will be executed
         :param select_expressions:
         :return:
         """
-        tables: List[Token] = []
+        tables: List[Table] = []
         having_expr = None
         where_expr = None
+        select_expressions_no_boolean_clauses: List[Union[str, Tree]] = []
+        distinct = False
         for select_expression in select_expressions:
             if isinstance(select_expression, Tree):
-                if select_expression.data == "from_expression":
-                    table_object = select_expression.children[0]
-                    if isinstance(table_object, JoinBase):
-                        tables += [
-                            table_object.right_table,
-                            table_object.left_table,
-                        ]
-                    elif (
-                        isinstance(table_object, Tree)
-                        and table_object.data == "cross_join_expression"
-                    ):
-                        cross_join: CrossJoin = table_object.children[0]
-                        tables += [
-                            cross_join.right_table,
-                            cross_join.left_table,
-                        ]
-                    else:
-                        tables.append(table_object)
-                elif select_expression.data == "having_expr":
+                expression_type = select_expression.data
+                if expression_type == "having_expr":
                     having_expr = select_expression
-                elif select_expression.data == "where_expr":
+                elif expression_type == "where_expr":
                     where_expr = select_expression
+                else:
+                    if expression_type == "from_expression":
+                        tables += self._get_from_item_tables(
+                            select_expression.children[0]
+                        )
+                    select_expressions_no_boolean_clauses.append(select_expression)
+            elif (
+                isinstance(select_expression, Token)
+                and select_expression.value.lower() == "distinct"
+            ):
+                distinct = True
 
         internal_transformer = InternalTransformer(
-            tables,  # type: ignore
+            tables,
             self._table_map,
             self._column_name_map,
             self._column_to_table_name,
             self._table_name_map,
             self._alias_registry,
+            self._now,
         )
 
-        select_expressions_no_boolean_clauses: List[Union[str, Tree]] = []
-        distinct = False
-        for select_expression in select_expressions:
-            if isinstance(select_expression, Tree) and select_expression.data not in (
-                "having_expr",
-                "where_expr",
-            ):
-                select_expressions_no_boolean_clauses.append(select_expression)
-            if (
-                isinstance(select_expression, Token)
-                and select_expression.value.lower() == "distinct"
-            ):
-                distinct = True
-
         return QueryInfo(
             internal_transformer,
             select_expressions_no_boolean_clauses,
@@ -812,6 +813,4 @@ class SQLTransformer(TransformerBaseClass):
         :param table:
         :return:
         """
-        DerivedColumn.reset_expression_count()
-        Literal.reset_literal_count()
         return table
@@ -1,9 +1,8 @@
-from datetime import date, datetime
-from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union, cast
 
 import ibis
-from ibis.expr.api import NumericColumn
-from ibis.expr.types import AnyColumn, AnyScalar, BooleanValue, NumericScalar, TableExpr
+from ibis.expr.types import AnyColumn, AnyScalar, NumericScalar, TableExpr
 from ibis.expr.window import Window as IbisWindow
 from lark import Token, Transformer
 
@@ -15,12 +14,8 @@ from sql_to_ibis.exceptions.sql_exception import (
     UnsupportedColumnOperation,
 )
 from sql_to_ibis.parsing.aggregation_aliases import (
-    AVG_AGGREGATIONS,
+    AGGREGATION_METHODS,
     COUNT_AGGREGATIONS,
-    MAX_AGGREGATIONS,
-    MIN_AGGREGATIONS,
-    NUMERIC_AGGREGATIONS,
-    SUM_AGGREGATIONS,
 )
 from sql_to_ibis.sql.sql_clause_objects import (
     AliasExpression,
@@ -39,8 +34,6 @@ from sql_to_ibis.sql.sql_value_objects import (
     Aggregate,
     Column,
     CountStar,
-    CrossJoin,
-    Date,
     Expression,
     GroupByColumn,
     JoinBase,
@@ -60,9 +53,13 @@ def num_eval(arg):
     :return:
     """
     assert isinstance(arg, (Token, float, int))
-    if isinstance(arg, str):
-        return eval(arg)
-    return arg
+    if isinstance(arg, (int, float)):
+        return arg
+    number_string = arg.value
+    try:
+        return int(number_string)
+    except ValueError:
+        return float(number_string)
 
 
 class TransformerBaseClass(Transformer):
@@ -78,14 +75,12 @@ class TransformerBaseClass(Transformer):
         table_map: Dict[str, Table],
         column_name_map: Dict[str, Dict[str, str]],
         column_to_table_name: Dict[str, Union[str, AmbiguousColumn]],
-        _temp_dataframes_dict=None,
     ):
         super().__init__(visit_tokens=False)
         self._table_name_map = table_name_map
         self._table_map = table_map
         self._column_name_map = column_name_map
         self._column_to_table_name = column_to_table_name
-        self._temp_dataframes_dict = _temp_dataframes_dict
 
 
 class InternalTransformer(TransformerBaseClass):
@@ -101,6 +96,7 @@ class InternalTransformer(TransformerBaseClass):
         column_to_table_name: Dict[str, Union[str, AmbiguousColumn]],
         table_name_map: Dict[str, str],
         alias_registry: AliasRegistry,
+        now: datetime,
     ):
         super().__init__(
             table_name_map=table_name_map,
@@ -115,6 +111,13 @@ class InternalTransformer(TransformerBaseClass):
         # we don't want that resolution to carry over to other subqueries
         self._remove_non_selected_tables_from_transformation()
         self._alias_registry = alias_registry
+        # Column references resolve the same way for the lifetime of the
+        # transformer, so the (table, true column name) pair is memoized by the
+        # table name given in the query ("" if none) and the lowercase column name
+        self._resolved_columns: Dict[Tuple[str, str], Tuple[Table, str]] = {}
+        # now() and today() are read once per query and shared by every transformer it
+        # creates, so subqueries and set operations see the same time
+        self._now = now
 
     def set_column_value(
         self, column: Column, table_name: Union[str, AmbiguousColumn] = ""
@@ -130,40 +133,43 @@ class InternalTransformer(TransformerBaseClass):
             return
         if column.name == "*":
             return
-        lower_column_name = column.name.lower()
-        if not table_name:
-            if lower_column_name not in self._column_to_table_name:
-                raise ColumnNotFoundError(column.name, self._table_names_list)
-            table_name = self._column_to_table_name[column.name.lower()]
         if isinstance(table_name, AmbiguousColumn):
             raise AmbiguousColumnException(column.name, list(table_name.tables))
-        table = self.get_table(table_name)
-        table_column_name_map = self._column_name_map[table.name]
-        if lower_column_name not in table_column_name_map:
-            raise ColumnNotFoundError(column.name, [table_name])
-        column_true_name = table_column_name_map[column.name.lower()]
+        resolution_key = (table_name, column.lower_name)
+        resolved = self._resolved_columns.get(resolution_key)
+        if resolved is None:
+            resolved = self._resolve_column(column, table_name)
+            self._resolved_columns[resolution_key] = resolved
+        table, column_true_name = resolved
         column.value = table.get_table_expr()[column_true_name]
         column.set_table(table)
 
+    def _resolve_column(self, column: Column, table_name: str) -> Tuple[Table, str]:
+        if not table_name:
+            column_table_name = self._column_to_table_name.get(column.lower_name, "")
+            if not column_table_name:
+                raise ColumnNotFoundError(column.name, self._table_names_list)
+            if isinstance(column_table_name, AmbiguousColumn):
+                raise AmbiguousColumnException(
+                    column.name, list(column_table_name.tables)
+                )
+            table_name = column_table_name
+        table = self.get_table(table_name)
+        column_true_name = self._column_name_map[table.name].get(column.lower_name)
+        if column_true_name is None:
+            raise ColumnNotFoundError(column.name, [table_name])
+        return table, column_true_name
+
     def _remove_non_selected_tables_from_transformation(self):
-        all_selected_table_names = {
-            table.name if isinstance(table, Table) else table
-            for table in self._table_names_list
-        }
-        for column in self._column_to_table_name:
-            table = self._column_to_table_name[column]
-            if isinstance(table, AmbiguousColumn):
-                present_tables = [
-                    ambig_table
-                    for ambig_table in table.tables
-                    if ambig_table in all_selected_table_names
-                ]
-                if len(present_tables) == 1:
-                    self._column_to_table_name[column] = present_tables[0]
-                elif len(present_tables) > 1:
-                    self._column_to_table_name[column] = AmbiguousColumn(
-                        set(present_tables)
-                    )
+        all_selected_table_names = frozenset(self._table_names_list)
+        for column, table in self._column_to_table_name.items():
+            if not isinstance(table, AmbiguousColumn):
+                continue
+            present_tables = table.tables & all_selected_table_names
+            if len(present_tables) == 1:
+                self._column_to_table_name[column] = next(iter(present_tables))
+            elif len(present_tables) > 1:
+                self._column_to_table_name[column] = AmbiguousColumn(present_tables)
 
     def transform(self, tree):
         new_tree = TransformerBaseClass.transform(self, tree)
@@ -171,6 +177,20 @@ class InternalTransformer(TransformerBaseClass):
             new_tree.value = new_tree.value.value
         return new_tree
 
+    def _pass_through(self, children: list):
+        """
+        Returns the only child of a rule that just wraps another rule
+        :param children:
+        :return:
+        """
+        return children[0]
+
+    bool_expression = _pass_through
+    bool_parentheses = _pass_through
+    comparison_type = _pass_through
+    cross_join_expression = _pass_through
+    timestamp_expression = _pass_through
+
     def apply_ibis_aggregation(
         self, column: Union[Column, IbisWindow], aggregation: str
     ) -> Union[CountStar, AnyScalar]:
@@ -181,20 +201,13 @@ class InternalTransformer(TransformerBaseClass):
             ibis_column = column.value
         if column.name == "*":
             return CountStar()
-        if aggregation in NUMERIC_AGGREGATIONS:
-            if not isinstance(ibis_column, NumericColumn):
-                raise UnsupportedColumnOperation(type(ibis_column), aggregation)
-            if aggregation in AVG_AGGREGATIONS:
-                return ibis_column.mean()
-            if aggregation in SUM_AGGREGATIONS:
-                return ibis_column.sum()
-        if aggregation in MAX_AGGREGATIONS:
-            return ibis_column.max()
-        if aggregation in MIN_AGGREGATIONS:
-            return ibis_column.min()
-        if aggregation in COUNT_AGGREGATIONS:
-            return ibis_column.count()
-        raise UnsupportedColumnOperation(type(ibis_column), aggregation)
+        method_name = AGGREGATION_METHODS.get(aggregation)
+        if method_name is None:
+            raise UnsupportedColumnOperation(type(ibis_column), aggregation)
+        aggregation_method = getattr(ibis_column, method_name, None)
+        if aggregation_method is None:
+            raise UnsupportedColumnOperation(type(ibis_column), aggregation)
+        return aggregation_method()
 
     def sql_aggregation(self, agg_parts: list):
         aggregation: Token = agg_parts[0]
@@ -224,8 +237,7 @@ class InternalTransformer(TransformerBaseClass):
         """
         Returns the product two numbers
         """
-        arg1 = args[0]
-        arg2 = args[1]
+        arg1, arg2 = args
         return num_eval(arg1) * num_eval(arg2)
 
     def expression_mul(self, args: Tuple):
@@ -234,16 +246,14 @@ class InternalTransformer(TransformerBaseClass):
         :param args:
         :return:
         """
-        arg1 = args[0]
-        arg2 = args[1]
+        arg1, arg2 = args
         return arg1 * arg2
 
     def add(self, args: Tuple):
         """
         Returns the sum two numbers
         """
-        arg1 = args[0]
-        arg2 = args[1]
+        arg1, arg2 = args
         return num_eval(arg1) + num_eval(arg2)
 
     def expression_add(self, args: Tuple):
@@ -252,16 +262,14 @@ class InternalTransformer(TransformerBaseClass):
         :param args:
         :return:
         """
-        arg1 = args[0]
-        arg2 = args[1]
+        arg1, arg2 = args
         return arg1 + arg2
 
     def sub(self, args: Tuple):
         """
         Returns the difference between two numbers
         """
-        arg1 = args[0]
-        arg2 = args[1]
+        arg1, arg2 = args
         return num_eval(arg1) - num_eval(arg2)
 
     def expression_sub(self, args: Tuple):
@@ -270,16 +278,14 @@ class InternalTransformer(TransformerBaseClass):
         :param args:
         :return:
         """
-        arg1 = args[0]
-        arg2 = args[1]
+        arg1, arg2 = args
         return arg1 - arg2
 
     def div(self, args: Tuple):
         """
         Returns the division of two numbers
         """
-        arg1 = args[0]
-        arg2 = args[1]
+        arg1, arg2 = args
         return num_eval(arg1) / num_eval(arg2)
 
     def expression_div(self, args):
@@ -288,8 +294,7 @@ class InternalTransformer(TransformerBaseClass):
         :param args:
         :return:
         """
-        arg1 = args[0]
-        arg2 = args[1]
+        arg1, arg2 = args
         return arg1 / arg2
 
     def number(self, numerical_value):
@@ -308,14 +313,6 @@ class InternalTransformer(TransformerBaseClass):
         """
         return String(string_token[0].value)
 
-    def timestamp_expression(self, date_list: List[Date]) -> Date:
-        """
-        Return a timestamp object
-        :param date_list:
-        :return:
-        """
-        return date_list[0]
-
     @staticmethod
     def int_token_list(token_list):
         """
@@ -354,7 +351,7 @@ class InternalTransformer(TransformerBaseClass):
         Return current date and time
         :return:
         """
-        date_value = Literal(datetime.now())
+        date_value = Literal(self._now)
         date_value.set_alias("now()")
         return date_value
 
@@ -363,7 +360,7 @@ class InternalTransformer(TransformerBaseClass):
         Return current date
         :return:
         """
-        date_value = Literal(date.today())
+        date_value = Literal(self._now.date())
         date_value.set_alias("today()")
         return date_value
 
@@ -373,7 +370,8 @@ class InternalTransformer(TransformerBaseClass):
         :param expressions:
         :return:
         """
-        return Value(expressions[0] != expressions[1])
+        left, right = expressions
+        return Value(left != right)
 
     def greater_than(self, expressions):
         """
@@ -381,7 +379,8 @@ class InternalTransformer(TransformerBaseClass):
         :param expressions:
         :return:
         """
-        return Value(expressions[0] > expressions[1])
+        left, right = expressions
+        return Value(left > right)
 
     def greater_than_or_equal(self, expressions):
         """
@@ -389,7 +388,8 @@ class InternalTransformer(TransformerBaseClass):
         :param expressions:
         :return:
         """
-        return Value(expressions[0] >= expressions[1])
+        left, right = expressions
+        return Value(left >= right)
 
     def less_than(self, expressions):
         """
@@ -397,7 +397,8 @@ class InternalTransformer(TransformerBaseClass):
         :param expressions:
         :return:
         """
-        return Value(expressions[0] < expressions[1])
+        left, right = expressions
+        return Value(left < right)
 
     def less_than_or_equal(self, expressions):
         """
@@ -405,7 +406,8 @@ class InternalTransformer(TransformerBaseClass):
         :param expressions:
         :return:
         """
-        return Value(expressions[0] <= expressions[1])
+        left, right = expressions
+        return Value(left <= right)
 
     def between(self, expressions: List[Value]):
         """
@@ -413,12 +415,9 @@ class InternalTransformer(TransformerBaseClass):
         :param expressions:
         :return:
         """
-        main_expression = expressions[0]
-        between_expressions = expressions[1:]
+        main_expression, lower_bound, upper_bound = expressions
         return Value(
-            main_expression.value.between(
-                between_expressions[0].value, between_expressions[1].value
-            )
+            main_expression.value.between(lower_bound.value, upper_bound.value)
         )
 
     def _get_expression_values(self, expressions: List[Value]):
@@ -442,21 +441,14 @@ class InternalTransformer(TransformerBaseClass):
         not_in_list = self._get_expression_values(expressions[1:])
         return Value(expressions[0].value.notin(not_in_list))
 
-    def bool_expression(self, expression: List[Value]) -> Value:
-        """
-        Return the bool sql_object
-        :param expression:
-        :return: boolean sql_object
-        """
-        return expression[0]
-
     def equals(self, expressions):
         """
         Compares two expressions for equality
         :param expressions:
         :return:
         """
-        return Value(expressions[0] == expressions[1])
+        left, right = expressions
+        return Value(left == right)
 
     def bool_and(self, truth_series_pair: List[Value]) -> Value:
         """
@@ -464,32 +456,17 @@ class InternalTransformer(TransformerBaseClass):
         :param truth_series_pair:
         :return:
         """
-        truth_series_pair_values: List[BooleanValue] = []
-        for i, value in enumerate(truth_series_pair):
-            truth_series_pair_values.append(value.get_value())
-        return Value(
-            truth_series_pair_values[0] & truth_series_pair_values[1],
-        )
-
-    def bool_parentheses(self, bool_expression_in_list: list):
-        return bool_expression_in_list[0]
+        left, right = truth_series_pair
+        return Value(left.get_value() & right.get_value())
 
-    def bool_or(self, truth_series_pair):
+    def bool_or(self, truth_series_pair: List[Value]) -> Value:
         """
         Return the truth value of the series pair
         :param truth_series_pair:
         :return:
         """
-        return Value(truth_series_pair[0] | truth_series_pair[1])
-
-    def comparison_type(self, comparison):
-        """
-        Return the comparison
-
-        :param comparison:
-        :return:
-        """
-        return comparison[0]
+        left, right = truth_series_pair
+        return Value(left.get_value() | right.get_value())
 
     def where_expr(self, where_value_list: List[Value]):
         """
@@ -507,9 +484,6 @@ class InternalTransformer(TransformerBaseClass):
         """
         return AliasExpression(str(name[0]))
 
-    def cross_join_expression(self, cross_join_list: List[CrossJoin]):
-        return cross_join_list[0]
-
     def from_expression(self, expression: List[Union[Subquery, JoinBase, Table]]):
         """
         Return a from sql_object token_or_tree
@@ -534,20 +508,16 @@ class InternalTransformer(TransformerBaseClass):
         :param when_expressions:
         :return:
         """
+        else_expression = cast(Value, when_expressions[-1])
+        when_then_pairs = cast(List[Tuple[Value, Value]], when_expressions[:-1])
         case_expression = ibis.case()
-        for i, when_expression in enumerate(when_expressions):
-            if isinstance(when_expression, tuple):
-                conditional_boolean = when_expression[0].get_value()
-                conditional_value = when_expression[1].get_value()
-                case_expression = case_expression.when(
-                    conditional_boolean, conditional_value
-                )
-            else:
-                case_expression = case_expression.else_(
-                    when_expression.get_value()
-                ).end()
-
-        return Expression(value=case_expression)
+        for conditional_boolean, conditional_value in when_then_pairs:
+            case_expression = case_expression.when(
+                conditional_boolean.get_value(), conditional_value.get_value()
+            )
+        return Expression(
+            value=case_expression.else_(else_expression.get_value()).end()
+        )
 
     def window_form(self, form):
         """
@@ -695,12 +665,14 @@ class InternalTransformer(TransformerBaseClass):
         )
 
     def get_table(self, table_or_alias_name) -> Table:
-        if isinstance(table_or_alias_name, Table):
+        # Table names are by far the most common argument, so look them up first
+        if isinstance(table_or_alias_name, str):
+            try_get_table = self._table_map.get(table_or_alias_name)
+            if try_get_table is not None:
+                return try_get_table
+        elif isinstance(table_or_alias_name, Table):
             return table_or_alias_name
-        try_get_table = self._table_map.get(table_or_alias_name)
-        if try_get_table is not None:
-            return try_get_table
-        if try_get_table is None and table_or_alias_name not in self._alias_registry:
+        if table_or_alias_name not in self._alias_registry:
             raise Exception(f"Table or alias '{table_or_alias_name}' not found")
         return self._alias_registry.get_registry_entry(table_or_alias_name)
 
@@ -717,7 +689,7 @@ class InternalTransformer(TransformerBaseClass):
             table_name_lower = table_name.lower()
             if table_name_lower in self._table_name_map:
                 table_name = self._table_name_map[table_name_lower]
-        column = Column(name="".join(name))
+        column = Column(name=name)
         self.set_column_value(column, table_name)
         return column
 
@@ -770,6 +742,7 @@ class InternalTransformerWithStarVal(InternalTransformer):
         column_to_table_name: Dict[str, Union[str, AmbiguousColumn]],
         table_name_map: Dict[str, str],
         alias_registry: AliasRegistry,
+        now: datetime,
         available_relations: List[TableExpr],
     ):
         super().__init__(
@@ -779,6 +752,7 @@ class InternalTransformerWithStarVal(InternalTransformer):
             column_name_map=column_name_map,
             column_to_table_name=column_to_table_name,
             alias_registry=alias_registry,
+            now=now,
         )
         self._available_relations = available_relations
 
@@ -805,6 +779,7 @@ class InternalTransformerWithStarVal(InternalTransformer):
             internal_transformer._column_to_table_name,
             internal_transformer._table_name_map,
             internal_transformer._alias_registry,
+            internal_transformer._now,
             available_relations,
         )
 
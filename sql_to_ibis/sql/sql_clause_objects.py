@@ -1,30 +1,43 @@
 from dataclasses import dataclass
 from typing import Optional, Union
 
+import ibis
+
 from sql_to_ibis.sql.sql_value_objects import Column, JoinBase, Subquery, Table, Value
 
 
 @dataclass
 class LimitExpression:
+    __slots__ = ("limit",)
     limit: int
 
 
 @dataclass
 class ValueExpression:
+    __slots__ = ("value",)
     value: Value
 
 
 @dataclass
 class WhereExpression(ValueExpression):
-    pass
+    __slots__ = ()
 
 
 @dataclass
 class ColumnExpression:
+    __slots__ = ("column", "_column_value")
     column: Column
 
+    def __post_init__(self):
+        self._column_value = None
+
     @property
     def column_value(self):
+        if self._column_value is None:
+            self._column_value = self._get_column_value()
+        return self._column_value
+
+    def _get_column_value(self):
         return self.column.get_value()
 
 
@@ -32,14 +45,15 @@ class ColumnExpression:
 class OrderByExpression(ColumnExpression):
     ascending: bool = True
 
-    @property
-    def column_value(self):
-        column = self.column if self.ascending else self.column.desc()
-        return column.get_value()
+    def _get_column_value(self):
+        column_value = self.column.get_value()
+        if self.ascending:
+            return column_value
+        return ibis.desc(column_value)
 
 
 class PartitionByExpression(ColumnExpression):
-    pass
+    __slots__ = ()
 
 
 @dataclass
@@ -66,9 +80,11 @@ class FrameExpression:
 
 @dataclass
 class FromExpression:
+    __slots__ = ("value",)
     value: Union[Subquery, JoinBase, Table]
 
 
 @dataclass
 class AliasExpression:
+    __slots__ = ("alias",)
     alias: str
@@ -2,7 +2,7 @@
 Module containing all sql objects
 """
 from dataclasses import InitVar, dataclass, field
-from typing import Any, Callable, ClassVar, Dict, List, Set
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Set
 
 import ibis
 from ibis.expr.types import AnyColumn, NumericScalar
@@ -62,28 +62,20 @@ class Window:
     }
 
     def __post_init__(self, window_part_list):
-        self.partition: List[AnyColumn] = [
-            clause.column_value
-            for clause in window_part_list
-            if isinstance(clause, PartitionByExpression)
-        ]
-        self.order_by: List[AnyColumn] = [
-            clause.column_value
-            for clause in window_part_list
-            if isinstance(clause, OrderByExpression)
-        ]
-        self.frame_expression: FrameExpression = self.__get_frame_expression(
-            window_part_list
+        self.partition: List[AnyColumn] = []
+        self.order_by: List[AnyColumn] = []
+        frame_expression: Optional[FrameExpression] = None
+        for clause in window_part_list:
+            if isinstance(clause, PartitionByExpression):
+                self.partition.append(clause.column_value)
+            elif isinstance(clause, OrderByExpression):
+                self.order_by.append(clause.column_value)
+            elif isinstance(clause, FrameExpression) and frame_expression is None:
+                frame_expression = clause
+        self.frame_expression: FrameExpression = (
+            frame_expression if frame_expression is not None else FrameExpression()
         )
 
-    def __get_frame_expression(self, window_part_list: list) -> FrameExpression:
-        filtered_expressions = [
-            clause for clause in window_part_list if isinstance(clause, FrameExpression)
-        ]
-        if not filtered_expressions:
-            return FrameExpression()
-        return filtered_expressions[0]
-
     def apply_ibis_window_function(self) -> IbisWindow:
         return self.aggregation.over(
             self.window_function_map[self.frame_expression.frame_type](
@@ -301,6 +301,7 @@ class Column(Value):
             self.final_name = self.alias
         else:
             self.final_name = self.name
+        self.lower_name = self.name.lower()
         self._table: Optional[Table] = None
 
     def __repr__(self):
@@ -335,10 +336,6 @@ class Column(Value):
     def set_table(self, table: Table):
         self._table = table
 
-    def desc(self):
-        self.value = ibis.desc(self.value)
-        return self
-
 
 @dataclass
 class CountStar(Column):
@@ -1,25 +1,30 @@
 """
 Convert sql query to an ibis expression
 """
+from collections import OrderedDict
 from copy import deepcopy
+from functools import lru_cache
 import os
 from pathlib import Path
+from threading import Lock
 from typing import Any, Dict
 
 from ibis.expr.types import TableExpr
-from lark import Lark, UnexpectedToken
+from lark import Lark, Tree, UnexpectedToken
 from lark.exceptions import VisitError
 
 from sql_to_ibis.exceptions.sql_exception import InvalidQueryException
 from sql_to_ibis.parsing.sql_parser import SQLTransformer
 from sql_to_ibis.sql.sql_objects import AmbiguousColumn
-from sql_to_ibis.sql.sql_value_objects import Table
+from sql_to_ibis.sql.sql_value_objects import DerivedColumn, Literal, Table
 
 _ROOT = Path(__file__).parent
 GRAMMAR_PATH = os.path.join(_ROOT, "grammar", "sql.lark")
 with open(file=GRAMMAR_PATH) as sql_grammar_file:
     _GRAMMAR_TEXT = sql_grammar_file.read()
 
+CURRENT_TIME_RULES = frozenset(["datetime_now", "date_today"])
+
 
 def register_temp_table(table: TableExpr, table_name: str):
     """
@@ -108,6 +113,12 @@ def query(sql: str) -> TableExpr:
     :class: ~`ibis.DataFrame`
         The :class: ~`ibis.expr.types.TableExpr` resulting from the SQL query provided
 
+    Notes
+    -----
+    Expressions are cached until a table is registered or removed, so repeating a
+    query (ignoring surrounding whitespace) returns the same shared
+    :class: ~`ibis.expr.types.TableExpr` object. Queries using now() or today() are
+    always rebuilt.
 
     """
     return SqlToTable(sql).ibis_expr
@@ -115,42 +126,106 @@ def query(sql: str) -> TableExpr:
 
 class SqlToTable:
     parser = Lark(_GRAMMAR_TEXT, parser="lalr")
+    # Expressions built against the currently registered tables, keyed by stripped
+    # sql text. Unlike _parse_tree this can't be an lru_cache: it has to be cleared
+    # whenever a table is registered or removed, and queries using now() or today()
+    # must be skipped. The oldest query is evicted first. The lock is held while an
+    # expression is built, so queries run one at a time
+    _ibis_expr_cache: "OrderedDict[str, TableExpr]" = OrderedDict()
+    _ibis_expr_cache_lock = Lock()
+    IBIS_EXPR_CACHE_SIZE = 256
 
     def __init__(self, sql: str):
         self.sql = sql
+        # Surrounding whitespace never changes the query, so queries that only
+        # differ by it share a cached expression. Inner whitespace is kept as is
+        # since it may be part of a string literal
+        self._cache_key = sql.strip()
 
         self.ast = self.parse_sql()
         self.ibis_expr = self.ast
 
-    def parse_sql(self):
-        try:
-            tree = self.parser.parse(self.sql)
-
-            table_info = TableInfo()
-
-            return SQLTransformer(
-                table_info.ibis_table_name_map.copy(),
-                table_info.ibis_table_map.copy(),
-                table_info.column_name_map.copy(),
-                deepcopy(table_info.column_to_table_name)  # Need deep copy so that
-                # ambiguous column references are not distorted
-            ).transform(tree)
-        except UnexpectedToken as err:
-            message = (
-                f"Expected one of the following input(s): {err.expected}\n"
-                f"Unexpected input at line {err.line}, column {err.column}\n"
-                f"{err.get_context(self.sql)}"
-            )
-            raise InvalidQueryException(message)
-        except VisitError as err:
-            curr_err: Exception = err
-            while True:
-                if isinstance(curr_err, VisitError):
-                    curr_err = curr_err.orig_exc
-                else:
-                    break
-            raise curr_err
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _parse_tree(sql: str) -> Tree:
+        """
+        Parse sql text into a lark tree. The tree only depends on the text and is
+        never mutated by the transformers, so the result can be shared between
+        queries
+        :param sql:
+        :return:
+        """
+        return SqlToTable.parser.parse(sql)
+
+    @staticmethod
+    def _uses_current_time(tree: Tree) -> bool:
+        """
+        Returns true if the query contains now() or today(), whose values change
+        between calls so the resulting expression cannot be reused
+        :param tree:
+        :return:
+        """
+        return any(tree.find_pred(lambda node: node.data in CURRENT_TIME_RULES))
+
+    @classmethod
+    def clear_ibis_expr_cache(cls):
+        with cls._ibis_expr_cache_lock:
+            cls._ibis_expr_cache.clear()
+
+    def _cache_ibis_expr(self, ibis_expr: TableExpr):
+        """
+        Stores the expression, evicting the oldest one once the cache is full. Must
+        be called while holding _ibis_expr_cache_lock
+        :param ibis_expr:
+        :return:
+        """
+        cache = self._ibis_expr_cache
+        cache[self._cache_key] = ibis_expr
+        if len(cache) > self.IBIS_EXPR_CACHE_SIZE:
+            cache.popitem(last=False)
 
+    def parse_sql(self):
+        # Unaliased columns are named from class level counters, so the whole miss
+        # path runs under the lock to keep concurrent queries from sharing them
+        with self._ibis_expr_cache_lock:
+            cached_expr = self._ibis_expr_cache.get(self._cache_key)
+            if cached_expr is not None:
+                return cached_expr
+            try:
+                tree = self._parse_tree(self.sql)
+
+                table_info = TableInfo()
+
+                ibis_expr = SQLTransformer(
+                    table_info.ibis_table_name_map.copy(),
+                    table_info.ibis_table_map.copy(),
+                    table_info.column_name_map.copy(),
+                    deepcopy(table_info.column_to_table_name)  # Need deep copy so that
+                    # ambiguous column references are not distorted
+                ).transform(tree)
+                if not self._uses_current_time(tree):
+                    self._cache_ibis_expr(ibis_expr)
+                return ibis_expr
+            except UnexpectedToken as err:
+                message = (
+                    f"Expected one of the following input(s): {err.expected}\n"
+                    f"Unexpected input at line {err.line}, column {err.column}\n"
+                    f"{err.get_context(self.sql)}"
+                )
+                raise InvalidQueryException(message)
+            except VisitError as err:
+                curr_err: Exception = err
+                while True:
+                    if isinstance(curr_err, VisitError):
+                        curr_err = curr_err.orig_exc
+                    else:
+                        break
+                raise curr_err
+            finally:
+                # Reset here rather than at the end of the transform so failed
+                # queries don't leave the counts behind either
+                DerivedColumn.reset_expression_count()
+                Literal.reset_literal_count()
 
 class TableInfo:
     column_to_table_name: Dict[str, Any] = {}
@@ -181,6 +256,7 @@ class TableInfo:
             lower_column = column.lower()
             self.column_name_map[table_name][lower_column] = column
             self.add_column_to_column_to_table_name_map(lower_column, table_name)
+        SqlToTable.clear_ibis_expr_cache()
 
     def remove_temp_table(self, table_name: str):
         if table_name.lower() not in self.ibis_table_name_map:
@@ -202,3 +278,4 @@ class TableInfo:
         del self.ibis_table_name_map[table_name.lower()]
         del self.ibis_table_map[real_table_name]
         del self.column_name_map[real_table_name]
+        SqlToTable.clear_ibis_expr_cache()
@@ -3,7 +3,19 @@ from pandas import read_csv
 import pytest
 
 from sql_to_ibis import register_temp_table, remove_temp_table
-from sql_to_ibis.tests.utils import DATA_PATH
+from sql_to_ibis.tests.utils import (
+    DATA_PATH,
+    TableInfoSnapshot,
+    reset_derived_counts,
+)
+
+
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    # Expose each phase's report to fixtures so teardown can tell if the test passed
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
 
 
 @pytest.fixture(scope="session")
@@ -66,3 +78,24 @@ def register_temp_tables(
     yield
     for table_name in tables:
         remove_temp_table(table_name)
+
+
+@pytest.fixture(scope="session")
+def table_info_snapshot(register_temp_tables):
+    return TableInfoSnapshot()
+
+
+@pytest.fixture(autouse=True)
+def state_not_changed(request, table_info_snapshot):
+    """
+    Checks that every test leaves the registered table metadata as it found it
+    """
+    yield
+    # Reset the counts so they don't leak into the next test
+    derived_counts = reset_derived_counts()
+    call_report = getattr(request.node, "rep_call", None)
+    if call_report is not None and call_report.passed:
+        table_info_snapshot.check(derived_counts)
+    else:
+        # Failed and expected to fail tests stop partway through a query
+        table_info_snapshot.resnapshot()
@@ -8,11 +8,8 @@ from sql_to_ibis.exceptions.sql_exception import (
     TableExprDoesNotExist,
     UnsupportedColumnOperation,
 )
-import sql_to_ibis.sql.sql_value_objects
-from sql_to_ibis.tests.utils import assert_state_not_change
 
 
-# TODO Make a session object so that class variables don't need to be reset
 @pytest.mark.parametrize(
     "sql",
     [
@@ -30,12 +27,9 @@ from sql_to_ibis.tests.utils import assert_state_not_change
              group by type ) t1""",
     ],
 )
-@assert_state_not_change
 def test_invalid_queries(sql):
     with pytest.raises(InvalidQueryException):
         query(sql)
-    sql_to_ibis.sql.sql_value_objects.DerivedColumn.reset_expression_count()
-    sql_to_ibis.sql.sql_value_objects.Literal.reset_literal_count()
 
 
 @pytest.mark.parametrize(
@@ -67,7 +61,6 @@ def test_not_implemented_errors(set_op: str):
         )
 
 
-@assert_state_not_change
 def test_for_non_existent_table():
     """
     Check that exception is raised if table does not exist
@@ -77,13 +70,11 @@ def test_for_non_existent_table():
         query("select * from a_table_that_is_not_here")
 
 
-@assert_state_not_change
 def test_ambiguous_column():
     with pytest.raises(AmbiguousColumnException):
         query("select type from digimon_move_list, digimon_mon_list")
 
 
-@assert_state_not_change
 def test_unsupported_operation_exception():
     with pytest.raises(UnsupportedColumnOperation):
         query("select sum(month) from forest_fires")
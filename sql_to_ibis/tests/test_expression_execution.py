@@ -187,3 +187,29 @@ def test_window_function(time_data):
         ]
     ).execute()
     assert_frame_equal(ibis_table, my_table)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "select now() as first_now, now() as second_now, today() as today "
+        "from forest_fires",
+        """
+        select first_now, now() as second_now, today() as today
+        from (select now() as first_now from forest_fires) fires
+        """,
+        """
+        select now() as first_now, now() as second_now, today() as today
+        from forest_fires
+         union all
+        select now() as first_now, now() as second_now, today() as today
+        from forest_fires
+        """,
+    ],
+)
+def test_now_is_constant_within_query(sql: str):
+    frame = query(sql).execute()
+    first_now = frame["first_now"]
+    assert first_now.nunique() == 1
+    assert (first_now == frame["second_now"]).all()
+    assert (frame["today"] == first_now[0].date()).all()
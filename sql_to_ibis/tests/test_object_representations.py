@@ -1,6 +1,7 @@
 import ibis
 
-from sql_to_ibis.sql.sql_value_objects import DerivedColumn, Literal, Value
+from sql_to_ibis.sql.sql_clause_objects import OrderByExpression
+from sql_to_ibis.sql.sql_value_objects import Column, DerivedColumn, Literal, Value
 
 
 def test_value_repr(time_data):
@@ -39,3 +40,12 @@ def test_literal_column():
         == "Literal(final_name=my_int, value=IbisIntegerScalar(), alias=my_int, "
         "type=integer)"
     )
+
+
+def test_descending_order_by_does_not_change_column(time_data):
+    column = Column(value=time_data.team, name="team")
+    order_by = OrderByExpression(column, False)
+    expected = ibis.desc(time_data.team)
+    assert order_by.column_value.equals(expected)
+    assert order_by.column_value.equals(expected)
+    assert column.value is time_data.team
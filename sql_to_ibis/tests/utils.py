@@ -1,20 +1,18 @@
 """
 Shared functions among the tests like setting up test environment
 """
-from copy import deepcopy
-from functools import wraps
 from pathlib import Path
 from subprocess import PIPE, Popen
 from tempfile import NamedTemporaryFile
-from typing import Callable, Set
+from typing import Set, Tuple
 
 import ibis
 from ibis.expr.groupby import GroupedTableExpr
 from ibis.expr.types import TableExpr
-from ibis.tests.util import assert_equal
 from pandas import DataFrame
 import pytest
 
+from sql_to_ibis.sql.sql_objects import AmbiguousColumn
 from sql_to_ibis.sql.sql_value_objects import DerivedColumn, Literal
 from sql_to_ibis.sql_select_query import TableInfo
 
@@ -67,45 +65,101 @@ def display_dict_difference(before_dict: dict, after_dict: dict, name: str):
     raise AssertionError(dict_diff_report)
 
 
-def assert_state_not_change(func: Callable):
-    @wraps(func)
-    def new_func(*args, **kwargs):
-        table_state = {}
-        for key in TableInfo.ibis_table_map:
-            table_state[key] = TableInfo.ibis_table_map[key]
-        column_to_table_name = deepcopy(TableInfo.column_to_table_name)
-        column_name_map = deepcopy(TableInfo.column_name_map)
-        dataframe_name_map = deepcopy(TableInfo.ibis_table_name_map)
-
-        # Reset the variables in the case of an error
-        try:
-            func(*args, **kwargs)
-        except Exception as err:
-            Literal.reset_literal_count()
-            DerivedColumn.reset_expression_count()
-            raise err
-
-        assert Literal.literal_count == 0
-        assert DerivedColumn.expression_count == 0
-
-        for key in TableInfo.ibis_table_map:
-            assert table_state[key] == TableInfo.ibis_table_map[key]
-        if column_to_table_name != TableInfo.column_to_table_name:
-            display_dict_difference(
-                column_to_table_name,
-                TableInfo.column_to_table_name,
-                "column_to_table_name",
-            )
-        if column_name_map != TableInfo.column_name_map:
-            display_dict_difference(
-                column_name_map, TableInfo.column_name_map, "column_name_map"
-            )
-        if dataframe_name_map != TableInfo.ibis_table_name_map:
-            display_dict_difference(
-                dataframe_name_map, TableInfo.ibis_table_name_map, "dataframe_name_map"
-            )
+def _freeze_column_to_table_name() -> dict:
+    return {
+        column: frozenset(table.tables) if isinstance(table, AmbiguousColumn) else table
+        for column, table in TableInfo.column_to_table_name.items()
+    }
+
+
+def _freeze_column_name_map() -> dict:
+    return {
+        table_name: dict(column_names)
+        for table_name, column_names in TableInfo.column_name_map.items()
+    }
+
+
+def get_table_info_state() -> Tuple[dict, dict, dict, dict]:
+    """
+    Returns a snapshot of the registered table metadata
+    :return:
+    """
+    return (
+        dict(TableInfo.ibis_table_map),
+        _freeze_column_to_table_name(),
+        _freeze_column_name_map(),
+        dict(TableInfo.ibis_table_name_map),
+    )
 
-    return new_func
+
+def reset_derived_counts() -> Tuple[int, int]:
+    """
+    Resets the literal and expression counts
+    :return: The literal and expression counts from before the reset
+    """
+    derived_counts = (Literal.literal_count, DerivedColumn.expression_count)
+    Literal.reset_literal_count()
+    DerivedColumn.reset_expression_count()
+    return derived_counts
+
+
+def assert_state_not_change(
+    table_info_state: Tuple[dict, dict, dict, dict], derived_counts: Tuple[int, int]
+):
+    """
+    Asserts that the registered table metadata still matches the snapshot and that
+    no literal or expression counts were left behind
+    :param table_info_state: Snapshot from get_table_info_state
+    :param derived_counts: Counts returned by reset_derived_counts
+    :return:
+    """
+    (
+        table_state,
+        column_to_table_name,
+        column_name_map,
+        dataframe_name_map,
+    ) = table_info_state
+
+    assert derived_counts == (0, 0), f"Counts were left at {derived_counts}"
+
+    if table_state != TableInfo.ibis_table_map:
+        display_dict_difference(table_state, TableInfo.ibis_table_map, "table_state")
+    after_column_to_table_name = _freeze_column_to_table_name()
+    if column_to_table_name != after_column_to_table_name:
+        display_dict_difference(
+            column_to_table_name,
+            after_column_to_table_name,
+            "column_to_table_name",
+        )
+    if column_name_map != TableInfo.column_name_map:
+        display_dict_difference(
+            column_name_map, TableInfo.column_name_map, "column_name_map"
+        )
+    if dataframe_name_map != TableInfo.ibis_table_name_map:
+        display_dict_difference(
+            dataframe_name_map, TableInfo.ibis_table_name_map, "dataframe_name_map"
+        )
+
+
+
+class TableInfoSnapshot:
+    """
+    Holds the registered table metadata that every test is expected to leave behind
+    """
+
+    def __init__(self):
+        self.resnapshot()
+
+    def resnapshot(self):
+        self.table_info_state = get_table_info_state()
+
+    def check(self, derived_counts: Tuple[int, int]):
+        table_info_state = self.table_info_state
+        if get_table_info_state() != table_info_state:
+            # Snapshot again so one test changing the state doesn't fail every test
+            # after it
+            self.resnapshot()
+        assert_state_not_change(table_info_state, derived_counts)
 
 
 def assert_ibis_equal_show_diff(obj1: TableExpr, obj2: TableExpr):
@@ -113,29 +167,30 @@ def assert_ibis_equal_show_diff(obj1: TableExpr, obj2: TableExpr):
         raise AssertionError(f"{obj1} is not of type TableExpr")
     if not isinstance(obj2, (TableExpr, GroupedTableExpr)):
         raise AssertionError(f"{obj2} is not of type TableExpr")
-    try:
-        assert_equal(obj1, obj2)
-    except AssertionError:
-        obj1_str = str(obj1)
-        obj2_str = str(obj2)
-        if obj1_str != obj2_str:
-            with NamedTemporaryFile(delete=False) as obj1_file, NamedTemporaryFile(
-                delete=False
-            ) as obj2_file:
-                obj1_file.write(bytes(obj1_str, encoding="utf-8"))
-                obj1_file.close()
-                obj2_file.write(bytes(obj2_str, encoding="utf-8"))
-                obj2_file.close()
-                process = Popen(
-                    ["diff", "-y", obj1_file.name, obj2_file.name],
-                    stdout=PIPE,
-                    stderr=PIPE,
-                )
-                output, _ = process.communicate()
-                str_output = output.decode("utf-8")
-
-            msg = f"Plan representations not equal!\n{str_output}"
-            raise AssertionError(msg)
+    # Identical or structurally equal plans are the common case, so only render and
+    # diff the plans when both checks fail
+    if obj1 is obj2 or obj1.equals(obj2):
+        return
+    obj1_str = str(obj1)
+    obj2_str = str(obj2)
+    if obj1_str != obj2_str:
+        with NamedTemporaryFile(delete=False) as obj1_file, NamedTemporaryFile(
+            delete=False
+        ) as obj2_file:
+            obj1_file.write(bytes(obj1_str, encoding="utf-8"))
+            obj1_file.close()
+            obj2_file.write(bytes(obj2_str, encoding="utf-8"))
+            obj2_file.close()
+            process = Popen(
+                ["diff", "-y", obj1_file.name, obj2_file.name],
+                stdout=PIPE,
+                stderr=PIPE,
+            )
+            output, _ = process.communicate()
+            str_output = output.decode("utf-8")
+
+        msg = f"Plan representations not equal!\n{str_output}"
+        raise AssertionError(msg)
 
 
 def _get_all_columns(table: TableExpr):